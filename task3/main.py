@@ -6,21 +6,65 @@ import sys
 from exitstatus import ExitStatus
 
 from task3 import circuit
+from task3.simulator import equivalent
+from task3.stats import CompilationStats
+from task3.target import Target, default_target
 
 # Define all command line arguments
-parser = argparse.ArgumentParser(description='QOSF mentorship program task 3. Read a Quil program and compile it using RXs, RZs and CZs')
+parser = argparse.ArgumentParser(description='QOSF mentorship program task 3. Read a Quil program and compile it to the basis gates and coupling map of a target (RXs, RZs and CZs by default)')
 parser.add_argument('infile', help='The Quil file to read from')
 parser.add_argument('-o', help='Optimize the circuit (up to two levels)', default=0, action='count')
+parser.add_argument('-t', '--target', help='A JSON file with the basis gates and coupling map of the target device (RX, RZ and CZ with all-to-all connectivity by default)', type=str)
+parser.add_argument('-s', '--stats', help='Write compilation statistics as JSON to a file (stderr if no file is given)', nargs='?', const='-', type=str)
+parser.add_argument('-c', '--check', help='Check that the compiled circuit is equivalent to the input one by simulating both on CHECK random states (1 if no number is given)', nargs='?', const=1, type=int)
+parser.add_argument('--seed', help='Set the seed for the random states used by --check', type=int)
 
 def main():
     args = parser.parse_args()
     infile = args.infile
     optimize = args.o
+    target_file = args.target
+    stats_file = args.stats
+    check = args.check
+    seed = args.seed
+
+    stats = CompilationStats() if stats_file else None
+
+    try:
+        target = Target.from_file(target_file) if target_file else default_target
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Can't read the target from {target_file}: {e!r}", file=sys.stderr)
+        sys.exit(ExitStatus.failure)
 
     dag = circuit.Circuit.from_quil(infile)
-    dag.compile(optimize=optimize)
+    original = dag.copy() if check else None
+    try:
+        dag.compile(optimize=optimize, stats=stats, target=target)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        sys.exit(ExitStatus.failure)
     dag.to_quil()
 
+    if dag.layout:
+        print(f"Final layout: {', '.join(f'{qubit} -> {physical_qubit}' for qubit, physical_qubit in sorted(dag.layout.items()))}", file=sys.stderr)
+
+    if stats_file == '-':
+        print(stats.to_json(indent=2), file=sys.stderr)
+    elif stats_file:
+        with open(stats_file, 'w') as f:
+            f.write(stats.to_json(indent=2))
+
+    if check:
+        try:
+            is_equivalent = equivalent(original, dag, n_states=check, seed=seed)
+        except ValueError as e:
+            print(f"Can't check the compiled circuit: {e}", file=sys.stderr)
+            sys.exit(ExitStatus.failure)
+        if not is_equivalent:
+            print('The compiled circuit is not equivalent to the input circuit', file=sys.stderr)
+            sys.exit(ExitStatus.failure)
+        print('The compiled circuit is equivalent to the input circuit', file=sys.stderr)
+
     sys.exit(ExitStatus.success)
 
 if __name__ == "__main__":
@@ -1,5 +1,7 @@
+from collections import deque
+from contextlib import nullcontext
 import re
-from typing import Iterable, List, Optional
+from typing import ContextManager, Dict, Iterator, List, Optional, Sequence, Tuple
 
 import networkx as nx
 from networkx.algorithms.dag import lexicographical_topological_sort, topological_sort
@@ -7,13 +9,17 @@ import numpy as np
 
 from task3.nodes import Node, Qubit, Gate
 from task3.optimizers import rotation_optimizers, cancellation_optimizers
-from task3.translators import translators, cnot_to_hczh
+from task3.rules import RuleSet
+from task3.stats import CompilationStats
+from task3.target import Target, default_target
 
 parser_regex = r'([a-zA-Z]+)(?:\(([0-9\.]+)\))? ([\d ]+)'
 
 class Circuit(object):
     def __init__(self, dag: nx.DiGraph = None) -> None:
         self._dag = dag
+        self._stats = None
+        self._layout = None
     
     @staticmethod
     def from_quil(filename: str) -> 'Circuit':
@@ -29,83 +35,216 @@ class Circuit(object):
 
                 # TODO: check values
 
-                operator_node = Gate(operator, qubits, argument)
-
-                for qubit in qubits:
-                    out_qubit = Qubit(qubit, side='out')
-                    if out_qubit not in dag:
-                        dag.add_edge(Qubit(qubit, side='in'), out_qubit, qubit=qubit)
-                
-                    previous_node = next(dag.predecessors(out_qubit))
-                    dag.remove_edge(previous_node, out_qubit)
-                    dag.add_edge(previous_node, operator_node, qubit=qubit)
-                    dag.add_edge(operator_node, out_qubit, qubit=qubit)
+                Circuit._append(dag, Gate(operator, qubits, argument))
 
         return Circuit(dag=dag)
 
+    @staticmethod
+    def _append(dag: nx.DiGraph, operator_node: Gate) -> None:
+        for qubit in operator_node._qubits:
+            out_qubit = Qubit(qubit, side='out')
+            if out_qubit not in dag:
+                dag.add_edge(Qubit(qubit, side='in'), out_qubit, qubit=qubit)
+        
+            previous_node = next(dag.predecessors(out_qubit))
+            dag.remove_edge(previous_node, out_qubit)
+            dag.add_edge(previous_node, operator_node, qubit=qubit)
+            dag.add_edge(operator_node, out_qubit, qubit=qubit)
+
+    def copy(self) -> 'Circuit':
+        circuit = Circuit(dag=self._dag.copy())
+        circuit._layout = self._layout
+        return circuit
+
+    @property
+    def layout(self) -> Optional[Dict[int, int]]:
+        """The physical qubit each qubit of the input circuit ends up in after routing, or None if it was not routed"""
+        return self._layout
+
+    def gates(self) -> Iterator[Gate]:
+        for node in lexicographical_topological_sort(self._dag, key=lambda node: node._qubits):
+            if node.type == 'gate':
+                yield node
+
     def to_quil(self, filename: str = None) -> None:
         if filename:
             #write to file
             pass
         else:
-            for node in lexicographical_topological_sort(self._dag, key=lambda node: node._qubits):
-                if node.type != 'gate':
-                    continue
+            for node in self.gates():
                 if node._args:
                     print(f"{node._gate}({','.join(node._args)}) {' '.join([str(qubit) for qubit in node._qubits])}")
                 else:
                     print(f"{node._gate} {' '.join([str(qubit) for qubit in node._qubits])}")
 
-    def replace_subgraph(self, nodes: Iterable[Node], replacement: nx.DiGraph) -> None:
-        sorted_dag = list(topological_sort(self._dag))
-        sorted_nodes = sorted(nodes, key=lambda node: sorted_dag.index(node))
+    def replace_subgraph(self, nodes: Sequence[Node], replacement: Sequence[Gate]) -> None:
+        """Replace a chain of consecutive nodes, in topological order, by a chain of gates"""
+        self._dag.add_nodes_from(replacement)
+        self._dag.add_edges_from(zip(replacement[:-1], replacement[1:]))
 
-        sorted_replacement = list(topological_sort(replacement))
+        for node in nodes:
+            for predecessor in list(self._dag.predecessors(node)):
+                if predecessor not in nodes:
+                    self._dag.add_edge(predecessor, replacement[0])
 
-        self._dag.update(replacement)
-
-        predecessors = list(self._dag.predecessors(sorted_nodes[0]))
-        
-        for predecessor in predecessors:
-            self._dag.add_edge(predecessor, sorted_replacement[0])
-            self._dag.remove_edge(predecessor, sorted_nodes[0])
-        
-        successors = list(self._dag.successors(sorted_nodes[-1]))
+            for successor in list(self._dag.successors(node)):
+                if successor not in nodes:
+                    self._dag.add_edge(replacement[-1], successor)
 
-        for successor in successors:
-            self._dag.add_edge(sorted_replacement[-1], successor)
-            self._dag.remove_edge(sorted_nodes[-1], successor)
-        
         self._dag.remove_nodes_from(nodes)
 
+    def compile(self, optimize: int = 0, stats: Optional[CompilationStats] = None, target: Target = default_target) -> None:
+        self._stats = stats
+        target_translators = target.translations
+        target_cnot_translators = RuleSet(rule for rule in target.translations if rule.pattern == ('CNOT',))
 
-    def compile(self, optimize: int = 0) -> None:
         previous_dag = nx.DiGraph()
+        routed = target.coupling_map is None
 
         while not nx.is_isomorphic(previous_dag, self._dag):
             previous_dag = self._dag.copy()
-            
-            if optimize >= 1:
-                self.translate([cnot_to_hczh])
-
-            if optimize > 0:
-                optzs = rotation_optimizers
-                if optimize >= 2:
-                    optzs += cancellation_optimizers
-                self.optimize(optzs)
-            
-            self.translate(translators)
-
-    def translate(self, translators: List) -> None:
+
+            with self._measure_round():
+                # Routing only uses the qubits of the gates, so it's only needed once, before any translation
+                if not routed:
+                    with self._measure_pass('routing'):
+                        self.route(target)
+                    routed = True
+
+                if optimize >= 1:
+                    with self._measure_pass('cnot_translation'):
+                        self.translate(target_cnot_translators)
+
+                if optimize > 0:
+                    optzs = rotation_optimizers
+                    if optimize >= 2:
+                        optzs = optzs + cancellation_optimizers
+                    with self._measure_pass('optimization'):
+                        self.optimize(optzs)
+
+                with self._measure_pass('translation'):
+                    self.translate(target_translators)
+
+        self._stats = None
+
+        # Identities are never run, so any target supports them
+        unsupported = {gate._gate for gate in self.gates()} - target.basis_gates - {'I'}
+        if unsupported:
+            raise ValueError(f"Can't translate {', '.join(sorted(unsupported))} to the basis gates of the target")
+
+    def route(self, target: Target) -> None:
+        """Insert SWAPs so that every two qubit gate acts on a pair of qubits coupled in the target
+
+        The gates are scheduled layer by layer, starting with the trivial layout. When no gate of the front layer can
+        be executed, the SWAP applied is the one that minimizes the distance between the qubits of the gates in the
+        front layer, and then in the next few two qubit gates. If no SWAP brings the front layer closer, the qubits of
+        its first gate are brought together along a shortest path, so the router always makes progress.
+        """
+        qubits = {qubit for gate in self.gates() for qubit in gate._qubits}
+        missing = qubits - set(target.coupling_map)
+        if missing:
+            raise ValueError(f"Qubits {', '.join(map(str, sorted(missing)))} are not in the coupling map of the target")
+        for gate in self.gates():
+            if len(gate._qubits) > 2:
+                raise ValueError(f"Can't route {gate._gate}, only gates on one or two qubits are supported")
+            if len(gate._qubits) == 2 and gate._qubits[1] not in target.distance[gate._qubits[0]]:
+                raise ValueError(f"Qubits {gate._qubits[0]} and {gate._qubits[1]} are not connected in the coupling map of the target")
+
+        layout = {qubit: qubit for qubit in target.coupling_map}
+        physical_to_logical = dict(layout)
+
+        pending = {node: sum(1 for predecessor in self._dag.predecessors(node) if predecessor.type == 'gate')
+                   for node in self._dag if node.type == 'gate'}
+        front = [node for node in topological_sort(self._dag) if node.type == 'gate' and pending[node] == 0]
+        dag = nx.DiGraph()
+
+        def physical(gate: Gate) -> Tuple[int, ...]:
+            return tuple(layout[qubit] for qubit in gate._qubits)
+
+        def cost(gates: Sequence[Gate]) -> int:
+            return sum(target.distance[q1][q2] for q1, q2 in map(physical, gates))
+
+        def swap(q1: int, q2: int) -> None:
+            Circuit._append(dag, Gate('SWAP', (q1, q2)))
+            self._record('swap')
+            l1, l2 = physical_to_logical[q1], physical_to_logical[q2]
+            physical_to_logical[q1], physical_to_logical[q2] = l2, l1
+            layout[l1], layout[l2] = q2, q1
+
+        while front:
+            executable = [gate for gate in front if len(gate._qubits) == 1 or target.coupled(*physical(gate))]
+            if executable:
+                for gate in executable:
+                    front.remove(gate)
+                    Circuit._append(dag, Gate(gate._gate, physical(gate), gate._args[0] if gate._args else None))
+                    for successor in self._dag.successors(gate):
+                        if successor.type == 'gate':
+                            pending[successor] -= 1
+                            if pending[successor] == 0:
+                                front.append(successor)
+                continue
+
+            lookahead = self._lookahead(front)
+            candidates = {tuple(sorted((q, neighbour))) for gate in front for q in physical(gate)
+                          for neighbour in target.coupling_map.neighbors(q)}
+
+            def swapped_cost(candidate: Tuple[int, int]) -> Tuple[float, float]:
+                q1, q2 = candidate
+                l1, l2 = physical_to_logical[q1], physical_to_logical[q2]
+                layout[l1], layout[l2] = q2, q1
+                costs = (cost(front), cost(lookahead) / max(len(lookahead), 1))
+                layout[l1], layout[l2] = q1, q2
+                return costs
+
+            costs = {candidate: swapped_cost(candidate) for candidate in sorted(candidates)}
+            best = min(costs, key=lambda candidate: costs[candidate][0] + 0.5*costs[candidate][1])
+            if costs[best][0] < cost(front):
+                swap(*best)
+            else:
+                path = nx.shortest_path(target.coupling_map, *physical(front[0]))
+                for q1, q2 in zip(path[:-2], path[1:-1]):
+                    swap(q1, q2)
+
+        previous_layout = self._layout or {}
+        qubits |= set(previous_layout) | {qubit for qubit, physical_qubit in layout.items() if qubit != physical_qubit}
+        self._layout = {qubit: layout[previous_layout.get(qubit, qubit)] for qubit in qubits}
+        self._dag = dag
+
+    def _lookahead(self, front: Sequence[Gate], size: int = 20) -> List[Gate]:
+        """The first two qubit gates that follow the front layer"""
+        lookahead = []
+        visited = set(front)
+        queue = deque(front)
+        while queue and len(lookahead) < size:
+            for successor in self._dag.successors(queue.popleft()):
+                if successor.type != 'gate' or successor in visited:
+                    continue
+                visited.add(successor)
+                queue.append(successor)
+                if len(successor._qubits) == 2:
+                    lookahead.append(successor)
+        return lookahead
+
+    def _measure_round(self) -> ContextManager:
+        return self._stats.round(self._dag) if self._stats is not None else nullcontext()
+
+    def _measure_pass(self, name: str) -> ContextManager:
+        return self._stats.pass_(name, self._dag) if self._stats is not None else nullcontext()
+
+    def _record(self, name: str) -> None:
+        if self._stats is not None:
+            self._stats.record(name)
+
+    def translate(self, translators: RuleSet) -> None:
         for node in topological_sort(self._dag):
             if node.type != 'gate':
                 continue
-            possible_translations = [f(node) for f in translators]
-            possible_translations = list(filter(None, possible_translations))
-            if possible_translations:
-                self.replace_subgraph([node], possible_translations[0])
+            rule = translators.match(node)
+            if rule:
+                self.replace_subgraph([node], rule.instantiate([node]))
+                self._record(rule.name)
     
-    def optimize(self, optimizers: List) -> None:
+    def optimize(self, optimizers: RuleSet) -> None:
         #dag = self._dag.copy()
 
         for node in nx.classes.function.nodes(self._dag):
@@ -113,8 +252,10 @@ class Circuit(object):
                 if node.type != 'gate' or neighbour.type != 'gate':
                     continue
 
-                possible_optimizations = [f(node, neighbour) for f in optimizers]
-                possible_optimizations = list(filter(None, possible_optimizations))
-                if possible_optimizations:
-                    self.replace_subgraph([node, neighbour], possible_optimizations[0])
+                rule = optimizers.match(node, neighbour)
+                # Merging both gates would create a cycle if the neighbour depends on any other gate that depends on node
+                if rule and not any(predecessor != node and nx.has_path(self._dag, node, predecessor)
+                                    for predecessor in self._dag.predecessors(neighbour)):
+                    self.replace_subgraph([node, neighbour], rule.instantiate([node, neighbour]))
+                    self._record(rule.name)
                     return
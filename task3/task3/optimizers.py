@@ -1,27 +1,12 @@
-from typing import Optional
+from task3.rules import Rule, RuleSet
 
-from networkx import DiGraph
+consecutive_rxs = Rule('consecutive_rxs', ['RX', 'RX'], [('RX', [0], '{0} + {1}')])
 
-from task3.nodes import Gate
+consecutive_rys = Rule('consecutive_rys', ['RY', 'RY'], [('RY', [0], '{0} + {1}')])
 
-def consecutive_rzs(gate1: Gate, gate2: Gate) -> Optional[DiGraph]:
-    if not ((gate1._gate == gate2._gate) and (gate1._qubits == gate2._qubits) and (gate1._gate in ('RX', 'RY', 'RZ'))):
-        return None
-    else:
-        gate = gate1._gate
-        arg = gate1._args[0] + ' + ' + gate2._args[0]
+consecutive_rzs = Rule('consecutive_rzs', ['RZ', 'RZ'], [('RZ', [0], '{0} + {1}')])
 
-        graph = DiGraph()
-        graph.add_node(Gate(gate, gate1._qubits, arg))
-        return graph
+consecutive_hs = Rule('consecutive_hs', ['H', 'H'], [('I', [0], None)])
 
-def consecutive_hs(gate1: Gate, gate2: Gate) -> Optional[DiGraph]:
-    if not ((gate1._gate == gate2._gate) and (gate1._qubits == gate2._qubits) and (gate1._gate == 'H')):
-        return None
-    else:
-        graph = DiGraph()
-        graph.add_node(Gate('I', gate1._qubits))
-        return graph
-
-rotation_optimizers = [consecutive_rzs]
-cancellation_optimizers = [consecutive_hs]
+rotation_optimizers = RuleSet([consecutive_rxs, consecutive_rys, consecutive_rzs])
+cancellation_optimizers = RuleSet([consecutive_hs])
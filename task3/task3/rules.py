@@ -0,0 +1,67 @@
+from collections import defaultdict
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from task3.nodes import Gate
+
+# Each element of a template is (gate, qubits, argument). The qubits are indices into the qubits of the matched gates,
+# and the argument, if any, is a format string whose fields are the arguments of the matched gates (e.g. '{0} + {1}')
+Template = Sequence[Tuple[str, Sequence[int], Optional[str]]]
+
+class Rule(object):
+    """A rewrite rule that replaces a sequence of consecutive gates acting on the same qubits
+
+    A rule with a single gate pattern is a translation, and a rule with a pattern of two gates is a peephole
+    optimization. The replacement is a chain of gates built from a template, which is precomputed when the rule
+    is created.
+    """
+    def __init__(self, name: str, pattern: Sequence[str], template: Template) -> None:
+        self.name = name
+        self.pattern = tuple(pattern)
+        self._template = tuple((gate, tuple(qubits), argument, argument is not None and '{' in argument)
+                               for gate, qubits, argument in template)
+
+    @property
+    def outputs(self) -> Tuple[str, ...]:
+        return tuple(gate for gate, _, _, _ in self._template)
+
+    def matches(self, gates: Sequence[Gate]) -> bool:
+        return all(gate._qubits == gates[0]._qubits for gate in gates[1:])
+
+    def instantiate(self, gates: Sequence[Gate]) -> List[Gate]:
+        qubits = gates[0]._qubits
+        arguments = [argument for gate in gates for argument in (gate._args or ())]
+
+        return [Gate(gate, tuple(qubits[qubit] for qubit in template_qubits), argument.format(*arguments) if formatted else argument)
+                for gate, template_qubits, argument, formatted in self._template]
+
+    def __repr__(self) -> str:
+        return f'Rule({self.name!r}, {self.pattern!r})'
+
+
+class RuleSet(object):
+    """A collection of rules indexed by the gates they match, so finding a rule for some gates is a dict lookup"""
+    def __init__(self, rules: Iterable[Rule] = ()) -> None:
+        self._rules: List[Rule] = []
+        self._index: Dict[Tuple[str, ...], List[Rule]] = defaultdict(list)
+        for rule in rules:
+            self.register(rule)
+
+    def register(self, rule: Rule) -> Rule:
+        self._rules.append(rule)
+        self._index[rule.pattern].append(rule)
+        return rule
+
+    def match(self, *gates: Gate) -> Optional[Rule]:
+        for rule in self._index.get(tuple(gate._gate for gate in gates), ()):
+            if rule.matches(gates):
+                return rule
+        return None
+
+    def __iter__(self) -> Iterator[Rule]:
+        return iter(self._rules)
+
+    def __len__(self) -> int:
+        return len(self._rules)
+
+    def __add__(self, other: 'RuleSet') -> 'RuleSet':
+        return RuleSet(list(self) + list(other))
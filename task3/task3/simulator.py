@@ -0,0 +1,271 @@
+import ast
+from functools import lru_cache
+import operator
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from task3.circuit import Circuit
+from task3.nodes import Gate
+
+_binary_operators = {ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul, ast.Div: operator.truediv}
+_unary_operators = {ast.UAdd: operator.pos, ast.USub: operator.neg}
+
+@lru_cache(maxsize=None)
+def parse_angle(expression: str) -> float:
+    """Evaluate a Quil angle expression such as 'pi/2', '-pi/2' or 'pi + pi/2'
+
+    Args:
+        expression: the gate argument, as stored in the Gate nodes
+
+    Returns:
+        The value of the angle
+    """
+    def evaluate(node: ast.AST) -> float:
+        if isinstance(node, ast.Expression):
+            return evaluate(node.body)
+        if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)):
+            return float(node.value)
+        if isinstance(node, ast.Name) and node.id == 'pi':
+            return np.pi
+        if isinstance(node, ast.BinOp) and type(node.op) in _binary_operators:
+            return _binary_operators[type(node.op)](evaluate(node.left), evaluate(node.right))
+        if isinstance(node, ast.UnaryOp) and type(node.op) in _unary_operators:
+            return _unary_operators[type(node.op)](evaluate(node.operand))
+        raise ValueError(f'Invalid angle expression: {expression}')
+
+    return evaluate(ast.parse(expression, mode='eval'))
+
+def _rx(theta: float) -> np.ndarray:
+    return np.array([[np.cos(theta/2), -1j*np.sin(theta/2)], [-1j*np.sin(theta/2), np.cos(theta/2)]])
+
+def _ry(theta: float) -> np.ndarray:
+    return np.array([[np.cos(theta/2), -np.sin(theta/2)], [np.sin(theta/2), np.cos(theta/2)]], dtype=complex)
+
+def _rz(theta: float) -> np.ndarray:
+    return np.array([[np.exp(-1j*theta/2), 0], [0, np.exp(1j*theta/2)]])
+
+fixed_gates = {
+    'I': np.eye(2, dtype=complex),
+    'H': np.array([[1, 1], [1, -1]], dtype=complex) / np.sqrt(2),
+    'X': np.array([[0, 1], [1, 0]], dtype=complex),
+    'Y': np.array([[0, -1j], [1j, 0]]),
+    'Z': np.array([[1, 0], [0, -1]], dtype=complex),
+}
+
+rotation_gates = {'RX': _rx, 'RY': _ry, 'RZ': _rz}
+
+def gate_matrix(gate: Gate) -> np.ndarray:
+    """The 2x2 unitary of a single qubit gate"""
+    if gate._gate in fixed_gates:
+        return fixed_gates[gate._gate]
+    if gate._gate in rotation_gates:
+        return rotation_gates[gate._gate](parse_angle(gate._args[0]))
+    raise ValueError(f'Unsupported single qubit gate: {gate._gate}')
+
+def _qubit_view(states: np.ndarray, positions: Sequence[int], n_qubits: int) -> Tuple[np.ndarray, List[int]]:
+    """Reshape a batch of statevectors so that each of the given qubits has its own axis of size 2
+
+    The returned array is a view of states, so gates can be applied in place to it. The second element is the list of
+    axes corresponding to each position, in the same order.
+    """
+    shape = [states.shape[0]]
+    axes = {}
+    previous = -1
+    for position in sorted(positions):
+        shape += [2**(position - previous - 1), 2]
+        axes[position] = len(shape) - 1
+        previous = position
+    shape.append(2**(n_qubits - previous - 1))
+
+    return states.reshape(shape), [axes[position] for position in positions]
+
+def _index(ndim: int, fixed: Dict[int, int]) -> Tuple:
+    return tuple(fixed.get(axis, slice(None)) for axis in range(ndim))
+
+def _buffer(scratch: np.ndarray, shape: Sequence[int], offset: int = 0) -> np.ndarray:
+    """A C-contiguous array of the given shape, backed by the scratch buffer starting at offset"""
+    size = int(np.prod(shape))
+    return scratch.reshape(-1)[offset:offset + size].reshape(shape)
+
+# Below this many trailing amplitudes per qubit value, the elementwise update iterates over too many short rows, and
+# a matrix product over the (..., 2, trailing) view is faster. Below _kron_max_trailing, even the matrix product has
+# too little work per row, and the 2x2 matrix is expanded to act on whole rows of 2*trailing amplitudes instead
+_elementwise_min_trailing = 2**13
+_kron_max_trailing = 4
+
+def _apply_matrix(view: np.ndarray, axis: int, matrix: np.ndarray, scratch: np.ndarray) -> None:
+    zero = view[_index(view.ndim, {axis: 0})]
+    one = view[_index(view.ndim, {axis: 1})]
+
+    if matrix[0, 1] == 0 and matrix[1, 0] == 0:
+        if matrix[0, 0] != 1:
+            zero *= matrix[0, 0]
+        if matrix[1, 1] != 1:
+            one *= matrix[1, 1]
+    elif matrix[0, 0] == 0 and matrix[1, 1] == 0:
+        previous_zero = _buffer(scratch, zero.shape)
+        np.copyto(previous_zero, zero)
+        np.multiply(one, matrix[0, 1], out=zero)
+        np.multiply(previous_zero, matrix[1, 0], out=one)
+    else:
+        zero_to_one = _buffer(scratch, zero.shape)
+        one_to_zero = _buffer(scratch, one.shape, zero.size)
+        np.multiply(zero, matrix[1, 0], out=zero_to_one)
+        np.multiply(one, matrix[0, 1], out=one_to_zero)
+        np.multiply(zero, matrix[0, 0], out=zero)
+        np.add(zero, one_to_zero, out=zero)
+        np.multiply(one, matrix[1, 1], out=one)
+        np.add(one, zero_to_one, out=one)
+
+def apply_single_qubit(states: np.ndarray, matrix: np.ndarray, position: int, n_qubits: int,
+                       scratch: Optional[np.ndarray] = None) -> None:
+    """Apply a 2x2 matrix to a qubit of a C-contiguous batch of statevectors, in place
+
+    scratch is a buffer with as many elements as states, which can be reused between calls to avoid allocating
+    temporary arrays for every gate.
+    """
+    scratch = scratch if scratch is not None else np.empty_like(states)
+    trailing = 2**(n_qubits - position - 1)
+    diagonal = matrix[0, 1] == 0 and matrix[1, 0] == 0
+    antidiagonal = matrix[0, 0] == 0 and matrix[1, 1] == 0
+
+    if diagonal or antidiagonal or trailing >= _elementwise_min_trailing:
+        view, (axis,) = _qubit_view(states, [position], n_qubits)
+        _apply_matrix(view, axis, matrix, scratch)
+    elif trailing > _kron_max_trailing:
+        view = states.reshape(-1, 2, trailing)
+        result = _buffer(scratch, view.shape)
+        np.matmul(matrix, view, out=result)
+        np.copyto(view, result)
+    else:
+        rows = states.reshape(-1, 2*trailing)
+        result = _buffer(scratch, rows.shape)
+        np.matmul(rows, np.kron(matrix, np.eye(trailing)).T, out=result)
+        np.copyto(rows, result)
+
+def apply_controlled(states: np.ndarray, matrix: np.ndarray, control: int, target: int, n_qubits: int,
+                     scratch: Optional[np.ndarray] = None) -> None:
+    scratch = scratch if scratch is not None else np.empty_like(states)
+    view, (control_axis, target_axis) = _qubit_view(states, [control, target], n_qubits)
+    controlled = view[_index(view.ndim, {control_axis: 1})]
+    _apply_matrix(controlled, target_axis - 1 if target_axis > control_axis else target_axis, matrix, scratch)
+
+def apply_swap(states: np.ndarray, q1: int, q2: int, n_qubits: int, scratch: Optional[np.ndarray] = None) -> None:
+    scratch = scratch if scratch is not None else np.empty_like(states)
+    view, (axis1, axis2) = _qubit_view(states, [q1, q2], n_qubits)
+    zero_one = view[_index(view.ndim, {axis1: 0, axis2: 1})]
+    one_zero = view[_index(view.ndim, {axis1: 1, axis2: 0})]
+    previous_zero_one = _buffer(scratch, zero_one.shape)
+    np.copyto(previous_zero_one, zero_one)
+    np.copyto(zero_one, one_zero)
+    np.copyto(one_zero, previous_zero_one)
+
+controlled_gates = {'CNOT': fixed_gates['X'], 'CZ': fixed_gates['Z']}
+
+def _commutes_with_controlled(matrix: np.ndarray, controlled: np.ndarray, is_control: bool) -> bool:
+    """Whether a single qubit matrix commutes with a controlled gate, when applied to its control or target qubit"""
+    if is_control or (controlled[0, 1] == 0 and controlled[1, 0] == 0):
+        return matrix[0, 1] == 0 and matrix[1, 0] == 0
+    return bool(np.all(matrix @ controlled == controlled @ matrix))
+
+def simulate(gates: Iterable[Gate], states: np.ndarray, qubits: Sequence[int]) -> np.ndarray:
+    """Apply a sequence of gates to a batch of statevectors, in place
+
+    Consecutive single qubit gates acting on the same qubit are fused into a single 2x2 matrix before being applied,
+    and the fused matrix is kept pending through the two qubit gates it commutes with (e.g. an RZ through the control
+    of a CNOT) and moved along by SWAPs. No full unitary is ever built, so the cost of each gate is linear in the size
+    of the statevectors.
+
+    Args:
+        gates: the gates to apply, in order
+        states: a C-contiguous array of shape (batch, 2**len(qubits))
+        qubits: the qubit labels. The i-th label is the i-th most significant qubit of the statevectors
+
+    Returns:
+        The states array, after applying the gates
+    """
+    n_qubits = len(qubits)
+    positions = {qubit: position for position, qubit in enumerate(qubits)}
+    pending: Dict[int, np.ndarray] = {}
+    scratch = np.empty_like(states)
+
+    def flush(qubit: int) -> None:
+        matrix = pending.pop(qubit, None)
+        if matrix is not None:
+            apply_single_qubit(states, matrix, positions[qubit], n_qubits, scratch)
+
+    for gate in gates:
+        if len(gate._qubits) == 1:
+            qubit = gate._qubits[0]
+            matrix = gate_matrix(gate)
+            pending[qubit] = matrix @ pending[qubit] if qubit in pending else matrix
+        elif gate._gate in controlled_gates:
+            control, target = gate._qubits
+            controlled = controlled_gates[gate._gate]
+            for qubit in (control, target):
+                if qubit in pending and not _commutes_with_controlled(pending[qubit], controlled, qubit == control):
+                    flush(qubit)
+            apply_controlled(states, controlled, positions[control], positions[target], n_qubits, scratch)
+        elif gate._gate == 'SWAP':
+            q1, q2 = gate._qubits
+            apply_swap(states, positions[q1], positions[q2], n_qubits, scratch)
+            matrix1, matrix2 = pending.pop(q1, None), pending.pop(q2, None)
+            if matrix1 is not None:
+                pending[q2] = matrix1
+            if matrix2 is not None:
+                pending[q1] = matrix2
+        else:
+            raise ValueError(f'Unsupported gate: {gate._gate}')
+
+    for qubit in list(pending):
+        flush(qubit)
+
+    return states
+
+def random_states(n_states: int, n_qubits: int, rng: np.random.Generator) -> np.ndarray:
+    """Draw Haar-random statevectors"""
+    states = rng.standard_normal((n_states, 2**n_qubits)) + 1j*rng.standard_normal((n_states, 2**n_qubits))
+    states /= np.linalg.norm(states, axis=1, keepdims=True)
+    return states
+
+def equivalent(circuit1: Circuit, circuit2: Circuit, n_states: int = 1, seed: Optional[int] = None, atol: float = 1e-8,
+               layout: Optional[Dict[int, int]] = None) -> bool:
+    """Check whether two circuits are equivalent up to a global phase, by simulating them on random input states
+
+    Args:
+        circuit1: a circuit
+        circuit2: another circuit
+        n_states: the number of random statevectors to simulate
+        seed: the seed for the random number generator
+        atol: the absolute tolerance used when comparing the output statevectors
+        layout: the qubit of circuit2 where the state of each qubit of circuit1 ends up, if they are permuted (e.g. by
+            routing). Defaults to the layout of circuit2
+
+    Returns:
+        Whether both circuits produce the same output states, up to a common global phase
+    """
+    gates1 = list(circuit1.gates())
+    gates2 = list(circuit2.gates())
+    layout = layout if layout is not None else circuit2.layout or {}
+    qubits = sorted({qubit for gate in gates1 + gates2 for qubit in gate._qubits} | set(layout) | set(layout.values()))
+
+    states1 = random_states(n_states, len(qubits), np.random.default_rng(seed))
+    states2 = states1.copy()
+
+    simulate(gates1, states1, qubits)
+    simulate(gates2, states2, qubits)
+
+    if layout:
+        positions = {qubit: position for position, qubit in enumerate(qubits)}
+        source = [positions[qubit] + 1 for qubit in layout]
+        destination = [positions[layout[qubit]] + 1 for qubit in layout]
+        tensor = states1.reshape((n_states,) + (2,)*len(qubits))
+        states1 = np.moveaxis(tensor, source, destination).reshape(n_states, -1)
+
+    overlap = np.vdot(states2[0], states1[0])
+    if not np.isclose(abs(overlap), 1, rtol=0, atol=atol):
+        return False
+    phase = overlap / abs(overlap)
+
+    return np.allclose(states2 * phase, states1, rtol=0, atol=atol)
@@ -0,0 +1,76 @@
+from collections import Counter
+from contextlib import contextmanager
+import json
+import time
+from typing import Dict, Iterator, List, Optional
+
+import networkx as nx
+
+def dag_size(dag: nx.DiGraph) -> Dict[str, int]:
+    gates = sum(1 for node in dag if node.type == 'gate')
+    return {'nodes': dag.number_of_nodes(), 'edges': dag.number_of_edges(), 'gates': gates}
+
+class CompilationStats(object):
+    """Collects per-round and per-pass statistics of a circuit compilation.
+
+    Every round of the fixed-point loop of `Circuit.compile` is recorded with its wall time and the size of the DAG
+    before and after it. Inside each round, every pass (routing, translation or optimization) is recorded in the same
+    way, together with the number of times each rule was applied (the router records the SWAPs it inserts as 'swap').
+    """
+    def __init__(self) -> None:
+        self._rounds: List[Dict] = []
+        self._current_pass: Optional[Dict] = None
+        self._rule_applications: Counter = Counter()
+        self._wall_time = 0.
+
+    @property
+    def iterations(self) -> int:
+        return len(self._rounds)
+
+    @property
+    def rule_applications(self) -> Dict[str, int]:
+        return dict(self._rule_applications)
+
+    @contextmanager
+    def round(self, dag: nx.DiGraph) -> Iterator[None]:
+        current_round = {'iteration': len(self._rounds) + 1, 'size_before': dag_size(dag), 'passes': []}
+        self._rounds.append(current_round)
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            current_round['wall_time'] = time.perf_counter() - start
+            current_round['size_after'] = dag_size(dag)
+            self._wall_time += current_round['wall_time']
+
+    @contextmanager
+    def pass_(self, name: str, dag: nx.DiGraph) -> Iterator[None]:
+        current_pass = {'name': name, 'size_before': dag_size(dag), 'rule_applications': Counter()}
+        self._rounds[-1]['passes'].append(current_pass)
+        self._current_pass = current_pass
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            current_pass['wall_time'] = time.perf_counter() - start
+            current_pass['size_after'] = dag_size(dag)
+            current_pass['rule_applications'] = dict(current_pass['rule_applications'])
+            self._current_pass = None
+
+    def record(self, name: str) -> None:
+        self._rule_applications[name] += 1
+        if self._current_pass is not None:
+            self._current_pass['rule_applications'][name] += 1
+
+    def to_dict(self) -> Dict:
+        return {
+            'iterations': self.iterations,
+            'wall_time': self._wall_time,
+            'rule_applications': self.rule_applications,
+            'rounds': self._rounds,
+        }
+
+    def to_json(self, **kwargs) -> str:
+        return json.dumps(self.to_dict(), **kwargs)
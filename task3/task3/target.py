@@ -0,0 +1,78 @@
+import json
+from typing import Iterable, Optional, Tuple
+
+import networkx as nx
+
+from task3.rules import RuleSet
+from task3.translators import translators
+
+class Target(object):
+    """The description of a device: the gates it can run natively and which pairs of qubits are coupled
+
+    Args:
+        basis_gates: the native gates of the device
+        coupling_map: the pairs of physical qubits two qubit gates can be applied to. If None, every pair of qubits is
+            coupled
+        rules: the translations to choose from. For each gate outside the basis, the target uses the rule that
+            translates it to the basis with the fewest gates, possibly through other translations
+
+    Raises:
+        ValueError: if some gate of the rules (or SWAP, if there is a coupling map) can't be translated to the basis
+    """
+    def __init__(self, basis_gates: Iterable[str], coupling_map: Optional[Iterable[Tuple[int, int]]] = None,
+                 rules: RuleSet = translators) -> None:
+        self.basis_gates = frozenset(basis_gates)
+        self.translations = self._select_translations(rules)
+
+        gates = {gate for rule in rules for gate in rule.pattern + rule.outputs}
+        if coupling_map is None:
+            gates.discard('SWAP')
+        unsupported = gates - self.basis_gates - {rule.pattern[0] for rule in self.translations}
+        if unsupported:
+            raise ValueError(f"Can't translate {', '.join(sorted(unsupported))} to the basis gates {', '.join(sorted(self.basis_gates))}")
+
+        if coupling_map is None:
+            self.coupling_map = None
+            self.distance = None
+        else:
+            self.coupling_map = nx.Graph()
+            self.coupling_map.add_edges_from((int(q1), int(q2)) for q1, q2 in coupling_map)
+            self.distance = dict(nx.all_pairs_shortest_path_length(self.coupling_map))
+
+    @staticmethod
+    def from_file(filename: str) -> 'Target':
+        """Read a target from a JSON file such as
+
+            {"basis_gates": ["RX", "RZ", "CZ"], "coupling_map": [[0, 1], [1, 2], [2, 3]]}
+
+        where coupling_map is optional.
+        """
+        with open(filename, 'r') as f:
+            description = json.load(f)
+
+        return Target(description['basis_gates'], description.get('coupling_map'))
+
+    def _select_translations(self, rules: RuleSet) -> RuleSet:
+        """For each gate outside the basis, the translation rule that needs the fewest basis gates"""
+        cost = {gate: 1 for gate in self.basis_gates}
+        selected = {}
+
+        updated = True
+        while updated:
+            updated = False
+            for rule in rules:
+                gate = rule.pattern[0]
+                if len(rule.pattern) != 1 or gate in self.basis_gates or not all(output in cost for output in rule.outputs):
+                    continue
+                rule_cost = sum(cost[output] for output in rule.outputs)
+                if rule_cost < cost.get(gate, float('inf')):
+                    cost[gate] = rule_cost
+                    selected[gate] = rule
+                    updated = True
+
+        return RuleSet(rule for rule in rules if selected.get(rule.pattern[0]) is rule)
+
+    def coupled(self, q1: int, q2: int) -> bool:
+        return self.coupling_map is None or self.coupling_map.has_edge(q1, q2)
+
+default_target = Target(['RX', 'RZ', 'CZ'])
@@ -1,58 +1,30 @@
-from typing import Optional
-
-from networkx import DiGraph
-
-from task3.nodes import Gate
-
-def h_to_rzrxrz(gate: Gate) -> Optional[DiGraph]:
-    if gate._gate != 'H':
-        return None
-    else:
-        first = Gate('RZ', gate._qubits, 'pi/2')
-        second = Gate('RX', gate._qubits, 'pi/2')
-        third = Gate('RZ', gate._qubits, 'pi/2')
-        return DiGraph([(first, second), (second, third)])
-
-def x_to_rx(gate: Gate) -> Optional[DiGraph]:
-    if gate._gate != 'X':
-        return None
-    else:
-        graph = DiGraph()
-        graph.add_node(Gate('RX', gate._qubits, 'pi'))
-        return graph
-
-def y_to_ry(gate: Gate) -> Optional[DiGraph]:
-    if gate._gate != 'Y':
-        return None
-    else:
-        graph = DiGraph()
-        graph.add_node(Gate('RY', gate._qubits, 'pi'))
-        return graph
-
-def z_to_rz(gate: Gate) -> Optional[DiGraph]:
-    if gate._gate != 'Z':
-        return None
-    else:
-        graph = DiGraph()
-        graph.add_node(Gate('RZ', gate._qubits, 'pi'))
-        return graph
-
-def ry_to_rxrzrx(gate: Gate) -> Optional[DiGraph]:
-    if gate._gate != 'RY':
-        return None
-    else:
-        first = Gate('RX', gate._qubits, 'pi/2')
-        second = Gate('RZ', gate._qubits, *gate._args)
-        third = Gate('RX', gate._qubits, '-pi/2')
-        return DiGraph([(first, second), (second, third)])
-
-def cnot_to_hczh(gate: Gate) -> Optional[DiGraph]:
-    if gate._gate != 'CNOT':
-        return None
-    else:
-        first = Gate('H', gate._qubits[1:])
-        second = Gate('CZ', gate._qubits)
-        third = Gate('H', gate._qubits[1:])
-        return DiGraph([(first, second), (second, third)])
-
-translators = [h_to_rzrxrz, x_to_rx, y_to_ry, z_to_rz, ry_to_rxrzrx, cnot_to_hczh]
+from task3.rules import Rule, RuleSet
+
+h_to_rzrxrz = Rule('h_to_rzrxrz', ['H'], [('RZ', [0], 'pi/2'), ('RX', [0], 'pi/2'), ('RZ', [0], 'pi/2')])
+
+x_to_rx = Rule('x_to_rx', ['X'], [('RX', [0], 'pi')])
+
+y_to_ry = Rule('y_to_ry', ['Y'], [('RY', [0], 'pi')])
+
+z_to_rz = Rule('z_to_rz', ['Z'], [('RZ', [0], 'pi')])
+
+ry_to_rxrzrx = Rule('ry_to_rxrzrx', ['RY'], [('RX', [0], 'pi/2'), ('RZ', [0], '{0}'), ('RX', [0], '-pi/2')])
+
+# Alternative translations, used by targets without RZ, RX or CZ
+h_to_ryrx = Rule('h_to_ryrx', ['H'], [('RY', [0], 'pi/2'), ('RX', [0], 'pi')])
+
+z_to_rxry = Rule('z_to_rxry', ['Z'], [('RX', [0], 'pi'), ('RY', [0], 'pi')])
+
+rz_to_rxryrx = Rule('rz_to_rxryrx', ['RZ'], [('RX', [0], '-pi/2'), ('RY', [0], '{0}'), ('RX', [0], 'pi/2')])
+
+rx_to_rzryrz = Rule('rx_to_rzryrz', ['RX'], [('RZ', [0], 'pi/2'), ('RY', [0], '{0}'), ('RZ', [0], '-pi/2')])
+
+cz_to_hcnoth = Rule('cz_to_hcnoth', ['CZ'], [('H', [1], None), ('CNOT', [0, 1], None), ('H', [1], None)])
+
+cnot_to_hczh = Rule('cnot_to_hczh', ['CNOT'], [('H', [1], None), ('CZ', [0, 1], None), ('H', [1], None)])
+
+swap_to_cnots = Rule('swap_to_cnots', ['SWAP'], [('CNOT', [0, 1], None), ('CNOT', [1, 0], None), ('CNOT', [0, 1], None)])
+
+# All the known translations. Targets pick, for each gate they don't support, the one that needs the fewest gates
+translators = RuleSet([h_to_rzrxrz, x_to_rx, y_to_ry, z_to_rz, ry_to_rxrzrx, cnot_to_hczh, swap_to_cnots,
+                       h_to_ryrx, z_to_rxry, rz_to_rxryrx, rx_to_rzryrz, cz_to_hcnoth])
@@ -0,0 +1,28 @@
+import random
+from typing import Callable
+
+import pytest
+
+from task3.circuit import Circuit
+
+single_qubit_gates = ['I', 'H', 'X', 'Y', 'Z', 'RX(0.3)', 'RY(pi/3)', 'RZ(-pi/4)', 'RX(pi + pi/2)']
+two_qubit_gates = ['CNOT', 'CZ']
+
+@pytest.fixture
+def random_circuit(tmp_path) -> Callable[..., Circuit]:
+    """A factory of random circuits, read from Quil files so they go through the same parser as main.py"""
+    def factory(seed: int, n_qubits: int = 4, n_gates: int = 25, two_qubit_ratio: float = 0.35) -> Circuit:
+        rng = random.Random(seed)
+        lines = []
+        for _ in range(n_gates):
+            if rng.random() < two_qubit_ratio:
+                qubits = rng.sample(range(n_qubits), 2)
+                lines.append(f"{rng.choice(two_qubit_gates)} {qubits[0]} {qubits[1]}")
+            else:
+                lines.append(f"{rng.choice(single_qubit_gates)} {rng.randrange(n_qubits)}")
+
+        filename = tmp_path / f'circuit_{seed}.quil'
+        filename.write_text('\n'.join(lines) + '\n')
+        return Circuit.from_quil(str(filename))
+
+    return factory
@@ -0,0 +1,48 @@
+import pytest
+
+from task3.circuit import Circuit
+from task3.simulator import equivalent
+from task3.target import Target
+
+line = Target(['RX', 'RZ', 'CZ'], [(0, 1), (1, 2), (2, 3)])
+grid = Target(['RX', 'RZ', 'CZ'], [(0, 1), (1, 2), (3, 4), (4, 5), (0, 3), (1, 4), (2, 5)])
+native_swaps = Target(['H', 'RX', 'RY', 'RZ', 'CZ', 'CNOT', 'SWAP'], [(0, 1), (1, 2), (2, 3)])
+
+@pytest.mark.parametrize('target, n_qubits', [(line, 4), (grid, 6), (native_swaps, 4)])
+@pytest.mark.parametrize('optimize', [0, 1, 2])
+@pytest.mark.parametrize('seed', range(5))
+def test_routed_circuits(random_circuit, target, n_qubits, optimize, seed):
+    original = random_circuit(seed, n_qubits=n_qubits)
+    compiled = original.copy()
+    compiled.compile(optimize=optimize, target=target)
+
+    for gate in compiled.gates():
+        assert gate._gate in target.basis_gates | {'I'}
+        if len(gate._qubits) == 2:
+            assert target.coupled(*gate._qubits)
+
+    assert compiled.layout is not None
+    assert equivalent(original, compiled, seed=seed)
+
+def test_routing_inserts_swaps(random_circuit):
+    original = random_circuit(0, n_gates=40)
+    compiled = original.copy()
+    compiled.compile(target=native_swaps)
+
+    assert any(gate._gate == 'SWAP' for gate in compiled.gates())
+    assert not equivalent(original, compiled, layout={})
+
+def test_qubits_outside_the_coupling_map(random_circuit):
+    with pytest.raises(ValueError):
+        random_circuit(0, n_qubits=5).compile(target=line)
+
+def test_disconnected_coupling_map(random_circuit):
+    with pytest.raises(ValueError):
+        random_circuit(0).compile(target=Target(['RX', 'RZ', 'CZ'], [(0, 1), (2, 3)]))
+
+def test_gates_on_more_than_two_qubits(tmp_path):
+    filename = tmp_path / 'ccnot.quil'
+    filename.write_text('H 0\nCCNOT 0 1 2\n')
+
+    with pytest.raises(ValueError):
+        Circuit.from_quil(str(filename)).compile(target=line)
@@ -0,0 +1,57 @@
+from task3.circuit import Circuit
+from task3.nodes import Gate
+from task3.optimizers import consecutive_hs, consecutive_rzs
+from task3.rules import Rule, RuleSet
+from task3.translators import cnot_to_hczh, h_to_rzrxrz, ry_to_rxrzrx
+
+def describe(gates):
+    return [(gate._gate, gate._qubits, gate._args) for gate in gates]
+
+def test_match_by_gate_name():
+    rules = RuleSet([h_to_rzrxrz, cnot_to_hczh])
+
+    assert rules.match(Gate('H', (0,))) is h_to_rzrxrz
+    assert rules.match(Gate('CNOT', (0, 1))) is cnot_to_hczh
+    assert rules.match(Gate('RZ', (0,), 'pi')) is None
+
+def test_match_requires_the_same_qubits():
+    rules = RuleSet([consecutive_hs])
+
+    assert rules.match(Gate('H', (0,)), Gate('H', (0,))) is consecutive_hs
+    assert rules.match(Gate('H', (0,)), Gate('H', (1,))) is None
+    assert rules.match(Gate('H', (0,)), Gate('X', (0,))) is None
+
+def test_instantiate_maps_qubits():
+    assert describe(cnot_to_hczh.instantiate([Gate('CNOT', (3, 5))])) == [
+        ('H', (5,), None), ('CZ', (3, 5), None), ('H', (5,), None)]
+
+def test_instantiate_formats_arguments():
+    assert describe(ry_to_rxrzrx.instantiate([Gate('RY', (2,), '0.3')])) == [
+        ('RX', (2,), ('pi/2',)), ('RZ', (2,), ('0.3',)), ('RX', (2,), ('-pi/2',))]
+    assert describe(consecutive_rzs.instantiate([Gate('RZ', (1,), 'pi'), Gate('RZ', (1,), 'pi/2')])) == [
+        ('RZ', (1,), ('pi + pi/2',))]
+
+def test_instantiate_creates_new_gates():
+    gate = Gate('H', (0,))
+
+    assert h_to_rzrxrz.instantiate([gate])[0] != h_to_rzrxrz.instantiate([gate])[0]
+
+def test_registered_rule_is_applied(tmp_path):
+    filename = tmp_path / 'xs.quil'
+    filename.write_text('X 0\nX 0\nH 1\n')
+    circuit = Circuit.from_quil(str(filename))
+
+    rules = RuleSet()
+    consecutive_xs = rules.register(Rule('consecutive_xs', ['X', 'X'], [('I', [0], None)]))
+    circuit.optimize(rules)
+
+    assert consecutive_xs in rules
+    assert describe(circuit.gates()) == [('I', (0,), None), ('H', (1,), None)]
+
+def test_adding_rule_sets_does_not_modify_them():
+    first = RuleSet([consecutive_rzs])
+    second = RuleSet([consecutive_hs])
+    both = first + second
+
+    assert list(both) == [consecutive_rzs, consecutive_hs]
+    assert list(first) == [consecutive_rzs]
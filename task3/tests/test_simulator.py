@@ -0,0 +1,90 @@
+from functools import reduce
+from typing import Sequence
+
+import numpy as np
+import pytest
+
+from task3.nodes import Gate
+from task3.simulator import apply_single_qubit, equivalent, gate_matrix, parse_angle, random_states, simulate
+
+def dense_unitary(gates: Sequence[Gate], qubits: Sequence[int]) -> np.ndarray:
+    """Build the full unitary of a circuit with Kronecker products. The first qubit is the most significant one"""
+    identity = np.eye(2)
+    projectors = [np.diag([1, 0]), np.diag([0, 1])]
+    targets = {'CNOT': np.array([[0, 1], [1, 0]]), 'CZ': np.diag([1, -1])}
+
+    unitary = np.eye(2**len(qubits), dtype=complex)
+    for gate in gates:
+        if len(gate._qubits) == 1:
+            operators = [gate_matrix(gate) if qubit == gate._qubits[0] else identity for qubit in qubits]
+            gate_unitary = reduce(np.kron, operators)
+        else:
+            control, target = gate._qubits
+            idle = reduce(np.kron, [projectors[0] if qubit == control else identity for qubit in qubits])
+            active = reduce(np.kron, [projectors[1] if qubit == control else targets[gate._gate] if qubit == target else identity
+                                      for qubit in qubits])
+            gate_unitary = idle + active
+        unitary = gate_unitary @ unitary
+
+    return unitary
+
+def check_against_dense(gates: Sequence[Gate], qubits: Sequence[int]) -> None:
+    states = random_states(3, len(qubits), np.random.default_rng(0))
+    expected = states @ dense_unitary(gates, qubits).T
+
+    np.testing.assert_allclose(simulate(gates, states, qubits), expected, atol=1e-12)
+
+@pytest.mark.parametrize('expression, value', [('pi/2', np.pi/2), ('-pi/2', -np.pi/2), ('pi + pi/2', 3*np.pi/2), ('1.00', 1.)])
+def test_parse_angle(expression, value):
+    assert parse_angle(expression) == pytest.approx(value)
+
+def test_parse_angle_rejects_other_expressions():
+    with pytest.raises(ValueError):
+        parse_angle('__import__("os")')
+
+@pytest.mark.parametrize('gate', ['I', 'H', 'X', 'Y', 'Z', 'RX', 'RY', 'RZ'])
+@pytest.mark.parametrize('qubit', [0, 3, 7])
+def test_single_qubit_gates(gate, qubit):
+    argument = '0.7' if gate.startswith('R') else None
+    check_against_dense([Gate(gate, (qubit,), argument)], [0, 3, 7])
+
+@pytest.mark.parametrize('gate', ['CNOT', 'CZ'])
+@pytest.mark.parametrize('qubits', [(0, 1), (1, 0), (0, 7), (7, 0), (3, 7), (7, 3)])
+def test_two_qubit_gates(gate, qubits):
+    check_against_dense([Gate(gate, qubits)], [0, 1, 3, 7])
+
+@pytest.mark.parametrize('position', range(14))
+def test_single_qubit_kernels(position):
+    # 14 qubits are enough to use the elementwise, matrix product and row kernels depending on the position
+    matrix = gate_matrix(Gate('RX', (0,), '0.3')) @ gate_matrix(Gate('H', (0,)))
+    states = random_states(2, 14, np.random.default_rng(position))
+    tensor = states.reshape((2,) + (2,)*14)
+    expected = np.moveaxis(np.tensordot(matrix, tensor, axes=([1], [position + 1])), 0, position + 1).reshape(2, -1)
+
+    apply_single_qubit(states, matrix, position, 14)
+    np.testing.assert_allclose(states, expected, atol=1e-12)
+
+def test_commuting_gates_are_deferred():
+    gates = [Gate('RZ', (0,), '0.3'), Gate('X', (1,)), Gate('CNOT', (0, 1)), Gate('RZ', (1,), '0.2'), Gate('CZ', (0, 1)),
+             Gate('H', (0,)), Gate('CNOT', (1, 0)), Gate('RX', (0,), '0.5'), Gate('CNOT', (1, 0))]
+    check_against_dense(gates, [0, 1])
+
+def test_fused_gates(random_circuit):
+    circuit = random_circuit(seed=0, n_gates=60)
+    check_against_dense(list(circuit.gates()), [0, 1, 2, 3])
+
+def test_equivalent_detects_differences(random_circuit):
+    circuit = random_circuit(seed=0)
+    different = random_circuit(seed=1)
+
+    assert equivalent(circuit, circuit.copy())
+    assert not equivalent(circuit, different)
+
+@pytest.mark.parametrize('optimize', [0, 1, 2])
+@pytest.mark.parametrize('seed', range(10))
+def test_compilation_is_equivalent(random_circuit, optimize, seed):
+    original = random_circuit(seed)
+    compiled = original.copy()
+    compiled.compile(optimize=optimize)
+
+    assert equivalent(original, compiled, seed=seed)
@@ -0,0 +1,51 @@
+import json
+from pathlib import Path
+
+from task3.circuit import Circuit
+from task3.stats import CompilationStats
+
+example = str(Path(__file__).parent.parent / 'test.quil')
+
+def test_compilation_statistics():
+    stats = CompilationStats()
+    Circuit.from_quil(example).compile(optimize=2, stats=stats)
+
+    assert stats.iterations == 7
+    assert stats.rule_applications['cnot_to_hczh'] == 4
+    assert stats.rule_applications['consecutive_hs'] == 1
+    assert stats.rule_applications['h_to_rzrxrz'] == 11
+
+    first_round = stats.to_dict()['rounds'][0]
+    assert first_round['size_before']['gates'] == 15
+    assert [current_pass['name'] for current_pass in first_round['passes']] == ['cnot_translation', 'optimization', 'translation']
+
+    cnot_translation, optimization, _ = first_round['passes']
+    assert cnot_translation['rule_applications'] == {'cnot_to_hczh': 4}
+    assert cnot_translation['size_before'] == {'nodes': 23, 'edges': 23, 'gates': 15}
+    assert cnot_translation['size_after'] == {'nodes': 31, 'edges': 31, 'gates': 23}
+    assert optimization['rule_applications'] == {'consecutive_hs': 1}
+    assert optimization['size_after']['gates'] == 22
+
+def test_rule_applications_add_up():
+    stats = CompilationStats()
+    Circuit.from_quil(example).compile(optimize=2, stats=stats)
+
+    total = {}
+    for current_round in stats.to_dict()['rounds']:
+        for current_pass in current_round['passes']:
+            for name, count in current_pass['rule_applications'].items():
+                total[name] = total.get(name, 0) + count
+
+    assert total == stats.rule_applications
+
+def test_no_statistics_by_default():
+    circuit = Circuit.from_quil(example)
+    circuit.compile(optimize=2)
+
+    assert circuit._stats is None
+
+def test_statistics_are_serializable():
+    stats = CompilationStats()
+    Circuit.from_quil(example).compile(stats=stats)
+
+    assert json.loads(stats.to_json())['iterations'] == stats.iterations
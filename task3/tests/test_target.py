@@ -0,0 +1,51 @@
+import pytest
+
+from task3.circuit import Circuit
+from task3.simulator import equivalent
+from task3.target import Target, default_target
+from task3.translators import cnot_to_hczh, h_to_rzrxrz, h_to_ryrx, ry_to_rxrzrx
+
+bases = [['RX', 'RZ', 'CZ'], ['RX', 'RY', 'CZ'], ['RY', 'RZ', 'CZ'], ['RX', 'RZ', 'CNOT'], ['H', 'RX', 'RY', 'RZ', 'CNOT']]
+
+def test_default_target_translations():
+    assert h_to_rzrxrz in default_target.translations
+    assert ry_to_rxrzrx in default_target.translations
+    assert h_to_ryrx not in default_target.translations
+
+def test_translations_are_chosen_for_the_basis():
+    target = Target(['RX', 'RY', 'CZ'])
+
+    assert h_to_ryrx in target.translations
+    assert h_to_rzrxrz not in target.translations
+    assert ry_to_rxrzrx not in target.translations
+    assert cnot_to_hczh in target.translations
+
+@pytest.mark.parametrize('basis_gates', [['RX', 'CZ'], ['RX', 'RZ'], ['RZ', 'CZ']])
+def test_unreachable_basis_is_rejected(basis_gates):
+    with pytest.raises(ValueError):
+        Target(basis_gates)
+
+def test_swap_is_only_required_with_a_coupling_map():
+    Target(['RX', 'RZ', 'CZ'])
+    Target(['RX', 'RZ', 'CZ'], [(0, 1)])
+
+def test_basis_without_rz(tmp_path):
+    filename = tmp_path / 'circuit.quil'
+    filename.write_text('RY(0.3) 0\nH 0\nCNOT 0 1\n')
+    original = Circuit.from_quil(str(filename))
+    compiled = original.copy()
+    compiled.compile(target=Target(['RX', 'RY', 'CZ']))
+
+    assert {gate._gate for gate in compiled.gates()} <= {'RX', 'RY', 'CZ'}
+    assert equivalent(original, compiled)
+
+@pytest.mark.parametrize('basis_gates', bases)
+@pytest.mark.parametrize('optimize', [0, 1, 2])
+@pytest.mark.parametrize('seed', range(5))
+def test_compilation_to_basis(random_circuit, basis_gates, optimize, seed):
+    original = random_circuit(seed)
+    compiled = original.copy()
+    compiled.compile(optimize=optimize, target=Target(basis_gates))
+
+    assert {gate._gate for gate in compiled.gates()} <= set(basis_gates) | {'I'}
+    assert equivalent(original, compiled, seed=seed)